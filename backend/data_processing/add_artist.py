@@ -43,6 +43,7 @@ import time
 import zipfile
 import io
 import re
+from functools import lru_cache
 from typing import List, Dict, Optional, Tuple
 
 import pandas as pd
@@ -120,6 +121,9 @@ AUDIODB_GENRE_MAP = {
     'world': 'indian', 'indian': 'indian', 'bollywood': 'pop-film',
 }
 
+# Bracketed suffixes stripped when normalizing track names: (remix), (feat. x), [explicit], etc.
+BRACKETED_PATTERN = re.compile(r'\([^)]*\)|\[[^\]]*\]')
+
 
 class ReccoBeatsClient:
     """Client for ReccoBeats API."""
@@ -275,16 +279,17 @@ def extract_spotify_id(url_or_id: str) -> str:
     return url_or_id
 
 
+@lru_cache(maxsize=65536)
 def normalize_track_name(name: str) -> str:
-    """Normalize track name for deduplication."""
+    """Normalize track name for deduplication (memoized, titles repeat across artists)."""
     if not name or pd.isna(name):
         return ""
-    # Lowercase, remove parentheses content, normalize spaces
-    normalized = str(name).lower().strip()
-    normalized = re.sub(r'\([^)]*\)', '', normalized)  # Remove (remix), (feat. x), etc.
-    normalized = re.sub(r'\[[^\]]*\]', '', normalized)  # Remove [explicit], etc.
-    normalized = re.sub(r'\s+', ' ', normalized).strip()
-    return normalized
+    # Lowercase, remove (...) and [...] in one regex pass, normalize spaces
+    normalized = str(name).lower()
+    # Most titles have no brackets at all - skip the regex for those
+    if '(' in normalized or '[' in normalized:
+        normalized = BRACKETED_PATTERN.sub('', normalized)
+    return ' '.join(normalized.split())
 
 
 def build_rows(artist_name: str, tracks: List[Dict], features: Dict[str, Dict], 
@@ -416,19 +421,22 @@ def deduplicate_with_report(df_combined: pd.DataFrame, df_main: pd.DataFrame) ->
     # Deduplicate by track_id
     before = len(df_combined)
     mask_id = df_combined["track_id"].isin(main_track_ids) | df_combined.duplicated(subset=["track_id"], keep="first")
-    removed_by_id = df_combined[mask_id][["artist_name", "track_name"]].values.tolist()
+    removed_by_id = df_combined.loc[mask_id, ["artist_name", "track_name"]].values.tolist()
     df_combined = df_combined[~mask_id]
     
     for artist, track in removed_by_id:
         removed_tracks.append(f"  - {artist} - {track} (duplicate track_id)")
     
-    # Deduplicate by normalized name within same artist
-    df_combined["_normalized"] = df_combined["track_name"].apply(normalize_track_name)
+    # Deduplicate by normalized name within same artist - build the key columns on the
+    # side instead of adding/dropping a temp column on the full frame
     before = len(df_combined)
-    mask_name = df_combined.duplicated(subset=["_normalized", "artist_name"], keep="first")
-    removed_by_name = df_combined[mask_name][["artist_name", "track_name"]].values.tolist()
+    keys = pd.DataFrame({
+        "_normalized": df_combined["track_name"].map(normalize_track_name),
+        "artist_name": df_combined["artist_name"],
+    })
+    mask_name = keys.duplicated(keep="first")
+    removed_by_name = df_combined.loc[mask_name, ["artist_name", "track_name"]].values.tolist()
     df_combined = df_combined[~mask_name]
-    df_combined = df_combined.drop(columns=["_normalized"])
     
     for artist, track in removed_by_name:
         removed_tracks.append(f"  - {artist} - {track} (similar name)")
@@ -34,6 +34,8 @@ The Dimensions (Output Columns):
 22. comedy_spoken       (Comedy, Spoken Word)
 """
 
+import numpy as np
+
 GENRE_DEFINITIONS = {
     # =========================================================================
     # ROCK & ALTERNATIVE
@@ -199,4 +201,17 @@ GENRE_DEFINITIONS = {
 
     # Sad Sierreño
     'sad':              {'latin_regional': 1.0, 'latin_tropical': 0.3, 'acoustic_folk': 0.2},
-}
\ No newline at end of file
+}
+
+
+# Frozen array form of GENRE_DEFINITIONS: GENRE_MATRIX[GENRE_INDEX[g], FAMILY_INDEX[f]] = weight
+GENRE_NAMES = list(GENRE_DEFINITIONS)
+FAMILY_NAMES = sorted({fam for families in GENRE_DEFINITIONS.values() for fam in families})
+GENRE_INDEX = {g: i for i, g in enumerate(GENRE_NAMES)}
+FAMILY_INDEX = {f: i for i, f in enumerate(FAMILY_NAMES)}
+
+GENRE_MATRIX = np.zeros((len(GENRE_NAMES), len(FAMILY_NAMES)), dtype=np.float64)
+for _genre, _families in GENRE_DEFINITIONS.items():
+    for _fam, _weight in _families.items():
+        GENRE_MATRIX[GENRE_INDEX[_genre], FAMILY_INDEX[_fam]] = _weight
+GENRE_MATRIX.setflags(write=False)
@@ -15,7 +15,11 @@ from pathlib import Path
 import pandas as pd
 from sklearn.preprocessing import MinMaxScaler
 import numpy as np
-from genre_families import GENRE_DEFINITIONS
+from genre_families import FAMILY_NAMES, GENRE_INDEX, GENRE_MATRIX
+
+
+# Decay neighbor influence (50%) to prevent generic genres from over-absorbing traits
+SMEARING_DECAY = 0.5
 
 
 def compute_genre_embeddings(unique_genres):
@@ -27,61 +31,31 @@ def compute_genre_embeddings(unique_genres):
     
     Returns: DataFrame indexed by genre, columns are family names (prefixed with 'genre_')
     """
-    # Get all family dimensions from the definitions
-    all_families = set()
-    for families in GENRE_DEFINITIONS.values():
-        all_families.update(families.keys())
-    all_families = sorted(all_families)
+    W = GENRE_MATRIX
     
-    # Reverse mapping: Family -> {Genre: Weight}
-    family_to_genres = {f: {} for f in all_families}
-    for genre, families in GENRE_DEFINITIONS.items():
-        for fam, weight in families.items():
-            family_to_genres[fam][genre] = weight
+    # 1. Direct Membership is W itself
     
-    embeddings = {}
+    # 2. Neighbor Connections: connection strength between g and n is their
+    # strongest shared family, then n's families propagate to g (with decay)
+    links = (W[:, None, :] * W[None, :, :]).max(axis=2)
+    np.fill_diagonal(links, 0.0)
+    smeared = (links[:, :, None] * W[None, :, :] * SMEARING_DECAY).max(axis=1)
+    
+    defined = np.maximum(W, smeared)
+    
+    # Genres without a definition get a zero vector
+    genres = list(unique_genres)
+    embeddings = np.zeros((len(genres), len(FAMILY_NAMES)))
+    for i, g in enumerate(genres):
+        if g in GENRE_INDEX:
+            embeddings[i] = defined[GENRE_INDEX[g]]
     
-    for g in unique_genres:
-        # Initialize vector for this genre
-        vec = {f"genre_{fam}": 0.0 for fam in all_families}
-        
-        # 1. Direct Membership
-        if g in GENRE_DEFINITIONS:
-            for fam, w in GENRE_DEFINITIONS[g].items():
-                vec[f"genre_{fam}"] = max(vec[f"genre_{fam}"], w)
-                
-        # 2. Neighbor Connections: Propagate traits from neighbors sharing a family
-        if g in GENRE_DEFINITIONS:
-            for fam_shared, w_g_in_shared in GENRE_DEFINITIONS[g].items():
-                # Look at other members of this shared family
-                # Decay neighbor influence (50%) to prevent generic genres from over-absorbing traits
-                SMEARING_DECAY = 0.5
-                
-                for neighbor, w_n_in_shared in family_to_genres[fam_shared].items():
-                    if neighbor == g:
-                        continue
-                        
-                    # Connection strength based on shared family
-                    connection_strength = w_g_in_shared * w_n_in_shared
-                    
-                    # Propagate neighbor's families to g (with decay)
-                    if neighbor in GENRE_DEFINITIONS:
-                        for fam_target, w_n_in_target in GENRE_DEFINITIONS[neighbor].items():
-                            score = connection_strength * w_n_in_target * SMEARING_DECAY
-                            col = f"genre_{fam_target}"
-                            vec[col] = max(vec[col], score)
-                            
-        embeddings[g] = vec
-
     # L2 normalize embeddings to keep direction but remove magnitude bias
-    df_emb = pd.DataFrame.from_dict(embeddings, orient='index')
-    for genre in df_emb.index:
-        vec = df_emb.loc[genre].values
-        norm = np.linalg.norm(vec)
-        if norm > 0:
-            df_emb.loc[genre] = vec / norm
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    np.divide(embeddings, norms, out=embeddings, where=norms > 0)
     
-    return df_emb
+    columns = [f"genre_{fam}" for fam in FAMILY_NAMES]
+    return pd.DataFrame(embeddings, index=genres, columns=columns)
 
 
 def parse_args() -> argparse.Namespace:
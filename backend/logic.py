@@ -2,10 +2,13 @@
 Recommendation logic for Vibe music recommendation app.
 Updated to use polars instead of pandas for memory efficiency.
 """
+import os
 import numpy as np
 import polars as pl
+from array import array
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Protocol
+from typing import Iterable, Protocol
 
 FEATURE_WEIGHTS = {
     'popularity': 0.6,
@@ -35,6 +38,9 @@ ARTIST_SAMPLING_CURVE = [
 # Number of tracks to recommend per artist
 TRACKS_PER_ARTIST = 4
 
+# Non-feature columns read at startup (genre_* embedding columns are picked up by prefix)
+METADATA_COLS = ['artist_name', 'track_name', 'track_id', 'popularity', 'genre']
+
 
 class DataSource(Protocol):
     def load(self) -> pl.DataFrame:
@@ -46,7 +52,30 @@ class ParquetDataSource:
         self.path = path
     
     def load(self) -> pl.DataFrame:
-        return pl.read_parquet(self.path)
+        prefetch_file(self.path)
+        columns = projected_columns(list(pl.read_parquet_schema(self.path)))
+        return pl.read_parquet(self.path, columns=columns, memory_map=True)
+
+
+def projected_columns(available: list[str]) -> list[str]:
+    """Subset of available columns that MusicData uses, in file order."""
+    wanted = set(METADATA_COLS) | set(FEATURE_WEIGHTS)
+    return [c for c in available if c in wanted or c.startswith('genre_')]
+
+
+def prefetch_file(path: Path) -> None:
+    """
+    Ask the kernel to start async readahead of the whole file into the page cache.
+    Same effect as madvise(MADV_WILLNEED) on a mapping, but works on the fd since
+    polars owns the actual mmap. No-op on platforms without posix_fadvise.
+    """
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+    finally:
+        os.close(fd)
 
 
 class MusicData:
@@ -56,6 +85,10 @@ class MusicData:
         self.matrix_audio: np.ndarray | None = None
         self.matrix_genre: np.ndarray | None = None
         self.artists_list: list[str] = []
+        self.artists_lower: list[str] = []
+        self.artist_trigrams: dict[str, array] = {}
+        self.artist_index: dict[str, int] = {}
+        self.artist_codes: np.ndarray | None = None
         self.audio_cols: list[str] = []
         self.genre_cols: list[str] = []
     
@@ -70,14 +103,32 @@ class MusicData:
         self.genre_cols = [c for c in df.columns if c.startswith('genre_')]
         self.audio_cols = [c for c in FEATURE_WEIGHTS.keys() if c in df.columns]
         
+        # Independent warm-up steps; numpy/polars release the GIL so these overlap
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            steps = [
+                pool.submit(self._build_audio_matrix, df),
+                pool.submit(self._build_genre_matrix, df),
+                pool.submit(self._build_artist_indexes, df),
+            ]
+            for step in steps:
+                step.result()
+        
+        # Keep metadata for display/lookup
+        keep_cols = [c for c in METADATA_COLS if c in df.columns]
+        
+        self.df = df.select(keep_cols)
+    
+    def _build_audio_matrix(self, df: pl.DataFrame) -> None:
         # Audio Matrix (Weighted for Euclidean)
         audio_data = df.select(self.audio_cols).to_numpy().astype(np.float16)
         weights = np.array([FEATURE_WEIGHTS[c] for c in self.audio_cols], dtype=np.float16)
         self.matrix_audio = audio_data * weights
-        
+    
+    def _build_genre_matrix(self, df: pl.DataFrame) -> None:
         # Genre Matrix (Unweighted for Cosine)
         self.matrix_genre = df.select(self.genre_cols).to_numpy().astype(np.float16)
-        
+    
+    def _build_artist_indexes(self, df: pl.DataFrame) -> None:
         # Sort artists by popularity
         artist_popularity = (
             df.group_by('artist_name')
@@ -85,14 +136,67 @@ class MusicData:
             .sort('popularity', descending=True)
         )
         self.artists_list = artist_popularity['artist_name'].to_list()
+        self.artists_lower = [a.lower() for a in self.artists_list]
+        self.artist_trigrams = build_trigram_index(self.artists_lower)
         
-        # Keep metadata for display/lookup
-        keep_cols = ['artist_name', 'track_name', 'track_id']
-        for col in ['popularity', 'genre']:
-            if col in df.columns:
-                keep_cols.append(col)
+        # Per-row artist code (index into artists_list) for NumPy-side filtering
+        self.artist_index = {a: i for i, a in enumerate(self.artists_list)}
+        self.artist_codes = (
+            df['artist_name']
+            .replace_strict(self.artist_index, return_dtype=pl.Int32)
+            .to_numpy()
+        )
+    
+    def search_artists(self, q: str, limit: int) -> list[str]:
+        """Case-insensitive substring search, results in popularity order."""
+        q_lower = q.lower()
         
-        self.df = df.select(keep_cols)
+        # Too short for the trigram index, fall back to a linear scan
+        if len(q_lower) < 3:
+            return self._collect_matches(q_lower, range(len(self.artists_lower)), limit)
+        
+        buckets = [self.artist_trigrams.get(gram) for gram in trigrams(q_lower)]
+        if not all(buckets):
+            return []
+        
+        # Intersect smallest buckets first to shrink the candidate set quickly
+        buckets.sort(key=len)
+        candidates = set(buckets[0])
+        for bucket in buckets[1:]:
+            candidates.intersection_update(bucket)
+            if not candidates:
+                return []
+        
+        # Trigram hits are only candidates, the full substring is checked below
+        return self._collect_matches(q_lower, sorted(candidates), limit)
+    
+    def _collect_matches(self, q_lower: str, indices: Iterable[int], limit: int) -> list[str]:
+        """Walk indices in popularity order, stopping once limit matches are found."""
+        matches = []
+        if limit <= 0:
+            return matches
+        for i in indices:
+            if q_lower in self.artists_lower[i]:
+                matches.append(self.artists_list[i])
+                if len(matches) == limit:
+                    break
+        return matches
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def build_trigram_index(names: list[str]) -> dict[str, array]:
+    """Map each trigram to the (ascending) indices of names containing it."""
+    index: dict[str, array] = {}
+    for i, name in enumerate(names):
+        for gram in trigrams(name):
+            bucket = index.get(gram)
+            if bucket is None:
+                bucket = index[gram] = array('i')
+            bucket.append(i)
+    return index
 
 
 def euclidean_distance(query: np.ndarray, matrix: np.ndarray) -> np.ndarray:
@@ -192,19 +296,27 @@ def generate_recommendations(
     
     d_total = np.sqrt(d_audio**2 + (d_genre * genre_weight)**2)
     
-    similar_indices = d_total.argsort()[:n]
+    # Only the n nearest tracks matter - partition them out, then sort just those
+    if 0 < n < len(d_total):
+        nearest = np.argpartition(d_total, n)[:n]
+        similar_indices = nearest[np.argsort(d_total[nearest])]
+    else:
+        similar_indices = d_total.argsort()[:n]
     
-    # Get similar songs and add score
-    similar_df = df[similar_indices.tolist()]
     scores = np.arange(n, 0, -1)
     
     if diversity > 1:
         scores = np.random.permutation(scores)
     
-    similar_df = similar_df.with_columns(pl.Series("score", scores))
+    # Exclude input artists on the index array before touching the DataFrame
+    exclude_codes = np.array(
+        [data.artist_index[a] for a in input_artists if a in data.artist_index],
+        dtype=np.int32
+    )
+    keep = ~np.isin(data.artist_codes[similar_indices], exclude_codes)
     
-    # Exclude input artists
-    pool = similar_df.filter(~pl.col('artist_name').is_in(input_artists))
+    # Get similar songs and add score
+    pool = df[similar_indices[keep].tolist()].lazy().with_columns(pl.Series("score", scores[keep]))
     
     # Group and aggregate
     artist_stats = (
@@ -214,27 +326,29 @@ def generate_recommendations(
             pl.col('track_id').count().alias('track_count')
         ])
         .filter(pl.col('track_count') >= 2)
-        .sort('total_score', descending=True)
+        # Name breaks total_score ties so the artist order is deterministic
+        .sort(['total_score', 'artist_name'], descending=[True, False])
         .head(max_artists)
+        .with_row_index('rank')
+        .select(['artist_name', 'rank'])
+    )
+    
+    # Only the columns that go into the response, in a fixed order, so rows can be unpacked as tuples
+    genre_col = pl.col('genre') if 'genre' in df.columns else pl.lit(None).alias('genre')
+    
+    # Top tracks of every selected artist in one plan, collected once (artists in rank order)
+    top_tracks = (
+        pool.join(artist_stats, on='artist_name')
+        .filter(pl.col('score').rank('ordinal', descending=True).over('artist_name') <= TRACKS_PER_ARTIST)
+        .sort(['rank', 'score'], descending=[False, True])
+        .select([pl.col('artist_name'), pl.col('track_id'), pl.col('track_name'), genre_col])
+        .collect()
     )
     
     recommendations = {}
-    for row in artist_stats.iter_rows(named=True):
-        artist = row['artist_name']
-        artist_tracks = (
-            pool.filter(pl.col('artist_name') == artist)
-            .sort('score', descending=True)
-            .head(TRACKS_PER_ARTIST)
+    for artist, track_id, track_name, genre in top_tracks.iter_rows():
+        recommendations.setdefault(artist, []).append(
+            {"track_id": track_id, "track_name": track_name, "genre": genre}
         )
-        
-        tracks = [
-            {
-                "track_id": r['track_id'],
-                "track_name": r['track_name'],
-                "genre": r.get('genre')
-            }
-            for r in artist_tracks.iter_rows(named=True)
-        ]
-        recommendations[artist] = tracks
     
     return recommendations
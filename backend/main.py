@@ -2,18 +2,31 @@
 FastAPI backend for Vibe music recommendation app.
 """
 
+import asyncio
+import hashlib
+import os
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from pathlib import Path
 
-from fastapi import FastAPI, HTTPException
+import orjson
+import polars as pl
+from fastapi import Depends, FastAPI, HTTPException, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel, Field, PrivateAttr, model_validator
 
 from logic import MusicData, ParquetDataSource, generate_recommendations
 
 # Data path - configurable via environment in production
 DATA_PATH = Path(__file__).parent / "data" / "data_encoded.parquet"
 
+# Rendered /artists/{name}/tracks responses kept per worker
+ARTIST_TRACKS_CACHE_SIZE = 2048
+
+# Track lists only change when the dataset is redeployed
+ARTIST_TRACKS_CACHE_CONTROL = "public, max-age=86400, immutable"
+
 # Global data container
 music_data: MusicData | None = None
 
@@ -27,22 +40,32 @@ async def lifespan(app: FastAPI):
         raise RuntimeError(f"Data file not found: {DATA_PATH}")
     
     source = ParquetDataSource(DATA_PATH)
-    music_data = MusicData(source)
-    music_data.load()
+    data = MusicData(source)
+    # Load off the event loop; MusicData fans the matrix/index builds out to threads
+    await asyncio.to_thread(data.load)
+    music_data = data
     
     print(f"Loaded {len(music_data.df):,} tracks, {len(music_data.artists_list):,} artists")
     
     yield
     
     # Cleanup if needed
+    render_artist_tracks.cache_clear()
     music_data = None
 
 
+class OrjsonResponse(JSONResponse):
+    """JSON response rendered with orjson (FastAPI's own ORJSONResponse is deprecated)."""
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+
 app = FastAPI(
     title="Vibe API",
     description="Music recommendation engine",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=OrjsonResponse
 )
 
 # CORS for frontend
@@ -55,12 +78,32 @@ app.add_middleware(
 )
 
 
+async def get_music_data() -> MusicData:
+    """Dependency for endpoints that need the loaded data; 503 until startup finishes."""
+    if music_data is None:
+        raise HTTPException(status_code=503, detail="Data not loaded")
+    return music_data
+
+
 class RecommendRequest(BaseModel):
     artists: list[str]
     track_ids: list[str] | None = None
     diversity: int = 2
-    max_artists: int = 6
+    max_artists: int = Field(default=6, ge=0)
     genre_weight: float = 2.0
+    
+    _valid_artists: list[str] = PrivateAttr(default_factory=list)
+    
+    @model_validator(mode='after')
+    def resolve_artists(self) -> 'RecommendRequest':
+        """Resolve requested artists against the catalog once, dropping repeats and unknown names."""
+        known = music_data.artist_index if music_data else {}
+        self._valid_artists = [a for a in dict.fromkeys(self.artists) if a in known]
+        return self
+    
+    @property
+    def valid_artists(self) -> list[str]:
+        return self._valid_artists
 
 
 class Track(BaseModel):
@@ -81,70 +124,104 @@ async def health():
 
 
 @app.get("/artists")
-async def get_artists(q: str = "", limit: int = 100) -> list[str]:
+async def get_artists(q: str = "", limit: int = 100, data: MusicData = Depends(get_music_data)) -> list[str]:
     """
     Get artist list, optionally filtered by search query.
     Returns artists sorted by popularity.
     """
-    if not music_data:
-        raise HTTPException(status_code=503, detail="Data not loaded")
-    
-    artists = music_data.artists_list
-    
     if q:
-        q_lower = q.lower()
-        artists = [a for a in artists if q_lower in a.lower()]
+        return data.search_artists(q, limit)
     
-    return artists[:limit]
+    return data.artists_list[:limit]
 
 
-@app.post("/recommend", response_model=RecommendResponse)
-async def recommend(request: RecommendRequest) -> RecommendResponse:
-    """Generate music recommendations based on selected artists."""
-    if not music_data:
-        raise HTTPException(status_code=503, detail="Data not loaded")
-    
+@app.post("/recommend", response_model=None, responses={200: {"model": RecommendResponse}})
+async def recommend(request: RecommendRequest, data: MusicData = Depends(get_music_data)) -> OrjsonResponse:
+    """
+    Generate music recommendations based on selected artists.
+    RecommendResponse is only used for the OpenAPI schema - the plain dicts from
+    generate_recommendations are returned as-is, skipping response validation.
+    """
     if not request.artists:
         raise HTTPException(status_code=400, detail="At least one artist required")
     
-    # Validate artists exist
-    valid_artists = [a for a in request.artists if a in music_data.artists_list]
-    if not valid_artists:
+    if not request.valid_artists:
         raise HTTPException(status_code=400, detail="No valid artists found")
     
-    recs = generate_recommendations(
-        data=music_data,
-        input_artists=valid_artists,
+    # CPU-bound numpy/polars work - run it in a worker thread so the event loop keeps serving
+    recs = await asyncio.to_thread(
+        generate_recommendations,
+        data=data,
+        input_artists=request.valid_artists,
         track_ids=request.track_ids,
         diversity=request.diversity,
         max_artists=request.max_artists,
         genre_weight=request.genre_weight
     )
     
-    return RecommendResponse(recommendations=recs)
+    return OrjsonResponse({"recommendations": recs})
+
+
+@lru_cache(maxsize=ARTIST_TRACKS_CACHE_SIZE)
+def render_artist_tracks(data: MusicData, artist_name: str) -> tuple[bytes, str] | None:
+    """Rendered JSON body and ETag for an artist's tracks, or None if the artist is unknown."""
+    # One lazy query: keep the most popular version of each name, most popular names first.
+    # Ties break on id/name so every worker renders (and ETags) the same body.
+    unique_tracks = (
+        data.df.lazy()
+        .filter(pl.col('artist_name') == artist_name)
+        .group_by('track_name')
+        .agg(
+            pl.col('track_id').sort_by(['popularity', 'track_id'], descending=[True, False]).first(),
+            pl.col('popularity').max()
+        )
+        .sort(['popularity', 'track_name'], descending=[True, False])
+        .select(['track_id', 'track_name'])
+        .collect()
+    )
+    
+    if len(unique_tracks) == 0:
+        return None
+    
+    body = orjson.dumps(unique_tracks.to_dicts())
+    etag = f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    return body, etag
 
 
-@app.get("/artists/{artist_name}/tracks")
-async def get_artist_tracks(artist_name: str) -> list[Track]:
+@app.get("/artists/{artist_name}/tracks", response_model=None, responses={200: {"model": list[Track]}})
+async def get_artist_tracks(
+    artist_name: str,
+    request: Request,
+    data: MusicData = Depends(get_music_data)
+) -> Response:
     """Get all tracks for a specific artist (for fine-tuning)."""
-    if not music_data:
-        raise HTTPException(status_code=503, detail="Data not loaded")
-    
-    df = music_data.df
-    artist_tracks = df.filter(df['artist_name'] == artist_name).select(['track_id', 'track_name'])
-    
-    if len(artist_tracks) == 0:
+    rendered = render_artist_tracks(data, artist_name)
+    if rendered is None:
         raise HTTPException(status_code=404, detail="Artist not found")
     
-    # Remove duplicates and convert to Track objects
-    unique_tracks = artist_tracks.unique(subset=['track_name'])
+    body, etag = rendered
+    headers = {"ETag": etag, "Cache-Control": ARTIST_TRACKS_CACHE_CONTROL}
+    # ETag is derived from the body, so it is stable across workers and restarts
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
     
-    return [
-        Track(track_id=row['track_id'], track_name=row['track_name'])
-        for row in unique_tracks.iter_rows(named=True)
-    ]
+    return Response(body, media_type="application/json", headers=headers)
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak If-None-Match comparison: a comma-separated tag list or '*', W/ prefixes ignored."""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
 
 
 if __name__ == "__main__":
+    # Local development only - production runs gunicorn with uvicorn workers (see Dockerfile)
     import uvicorn
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        reload=os.environ.get("VIBE_RELOAD") == "1"
+    )